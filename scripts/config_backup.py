@@ -1,115 +1,559 @@
 # scripts/config_backup.py
 # incorporating Netmiko and error handling
 
-import netmiko # type: ignore
-import datetime
+# netmiko (which pulls in paramiko and cryptography), yaml and zstandard are imported
+# where they're first needed, so --help and argument errors don't pay for loading them.
 import os
-import yaml # type: ignore
 import logging
 import argparse
 import sys
-# from netmiko import ConnectHandler # type: ignore - Not strictly needed if using netmiko.ConnectHandler
-from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException, NetmikoBaseException # type: ignore # Added NetmikoBaseException
+import contextlib
+import hashlib
+import importlib.util
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
 
 # GLOBAL SETTING FOR DEBUGGING - CORRECTED PLACEMENT
 # Set this to True to enable Netmiko session logging (highly recommended for debugging)
 # Set to False when you don't need detailed session logs anymore (e.g., in production)
 ENABLE_SESSION_LOGGING = True
+# Where Netmiko session logs are written when ENABLE_SESSION_LOGGING is on
+SESSION_LOG_DIR = "debug_logs/sessions"
+
+class ConnPool:
+    """Keeps live Netmiko connections around so repeat work on a device skips the SSH handshake.
+
+    Connections are keyed by (host, username, password, device_type, session_log), so a
+    connection is only reused for exactly the same login and session log. A connection is
+    handed out to one caller at a time: acquire() takes it out of the pool and release()
+    puts it back. At most max_idle connections are kept (the least recently used are closed
+    first), and connections left idle longer than idle_timeout seconds are closed. With
+    max_idle=0 (the default, see --max-idle) release() simply disconnects.
+
+    Within one backup run each device is backed up once and its session log name is unique
+    to the device, so a pooled connection is only reused for duplicate entries in
+    devices.yaml, or when backup_config() is called again for the same device in the same
+    process (e.g. from another script importing this module).
+
+    The per-type session limit itself is enforced by PlatformDispatcher, which caps the
+    backups in flight (and so the connections in use) per device type. The pool only makes
+    sure its idle connections don't push a type over platform_limit(): idle connections of
+    that type are closed before a new one is opened, and on release, as needed.
+    """
+
+    # ConnectHandler arguments that must match for a pooled connection to be reused
+    POOL_KEY_FIELDS = ('host', 'username', 'password', 'device_type', 'session_log')
+
+    def __init__(self, idle_timeout=300, max_idle=0):
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = {}  # key (see POOL_KEY_FIELDS) -> (connection, last_used)
+        self._keys = {}  # id(connection) -> key, for connections handed out
+        self._in_use = defaultdict(int)  # device_type -> connections handed out or being opened
+
+    def acquire(self, netmiko_device_params):
+        """Returns a live connection for the device, reusing an idle one if possible."""
+        key = tuple(netmiko_device_params.get(name) for name in self.POOL_KEY_FIELDS)
+        device_type = netmiko_device_params['device_type']
+        with self._lock:
+            to_close = self._pop_expired()
+            entry = self._idle.pop(key, None)
+            self._in_use[device_type] += 1
+            if entry is None:
+                # Make room for the connection about to be opened
+                to_close += self._pop_over_limit(device_type)
+        for conn in to_close:
+            self._close(conn)
+
+        if entry is not None:
+            conn = entry[0]
+            if conn.is_alive():
+                logging.debug("Reusing pooled connection to %s", conn.host)
+                with self._lock:
+                    self._keys[id(conn)] = key
+                return conn
+            logging.debug("Pooled connection to %s is dead, reconnecting", conn.host)
+            self._close(conn)
+
+        try:
+            import netmiko # type: ignore
+            conn = netmiko.ConnectHandler(**netmiko_device_params)
+        except BaseException:
+            with self._lock:
+                self._in_use[device_type] -= 1
+            raise
+        with self._lock:
+            self._keys[id(conn)] = key
+        return conn
+
+    def release(self, conn):
+        """Returns a connection to the pool for later reuse, or disconnects it if the pool is full."""
+        previous = None
+        with self._lock:
+            key = self._keys.pop(id(conn))
+            self._in_use[conn.device_type] -= 1
+            if self.max_idle <= 0:
+                to_close = [conn]
+            else:
+                previous = self._idle.pop(key, None)
+                self._idle[key] = (conn, time.monotonic())
+                to_close = self._pop_expired() + self._pop_over_limit(conn.device_type)
+                # Dicts keep insertion order and release() re-inserts, so the first entries are the least recently used
+                while len(self._idle) > self.max_idle:
+                    to_close.append(self._idle.pop(next(iter(self._idle)))[0])
+        if previous is not None and previous[0] is not conn:
+            to_close.append(previous[0])
+        for stale in to_close:
+            self._close(stale)
+
+    def close_all(self):
+        """Disconnects every pooled connection."""
+        with self._lock:
+            conns = [conn for conn, _ in self._idle.values()]
+            self._idle.clear()
+        for conn in conns:
+            self._close(conn)
+
+    def _pop_over_limit(self, device_type):
+        # Caller must hold self._lock. Takes out the least recently used idle connections
+        # of this type until idle + in use fits within platform_limit(device_type).
+        idle_keys = [key for key, (conn, _) in self._idle.items() if conn.device_type == device_type]
+        excess = len(idle_keys) + self._in_use[device_type] - platform_limit(device_type)
+        return [self._idle.pop(key)[0] for key in idle_keys[:max(excess, 0)]]
+
+    def _pop_expired(self):
+        # Caller must hold self._lock
+        now = time.monotonic()
+        expired = [key for key, (_, last_used) in self._idle.items() if now - last_used > self.idle_timeout]
+        return [self._idle.pop(key)[0] for key in expired]
+
+    def _close(self, conn):
+        try:
+            conn.disconnect()
+        except Exception as e:
+            logging.debug("Error while closing connection to %s: %s", conn.host, e)
+
+# Process-wide connection pool shared by all backup threads
+POOL = ConnPool()
+
+# Maximum open SSH sessions per device_type. Platforms not listed in PLATFORM_LIMITS
+# (set from --per-type-limit) use DEFAULT_PLATFORM_LIMIT (set from MAX_PER_PLATFORM in main()).
+DEFAULT_PLATFORM_LIMIT = 4
+PLATFORM_LIMITS = {}
+
+def platform_limit(device_type):
+    """Returns the maximum number of open sessions to devices of this type."""
+    return PLATFORM_LIMITS.get(device_type, DEFAULT_PLATFORM_LIMIT)
+
+def positive_int(value):
+    """argparse type for options that must be an integer >= 1."""
+    if not value.strip().isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError(f"invalid value {value!r}, expected an integer >= 1")
+    return int(value)
+
+def non_negative_int(value):
+    """argparse type for options that must be an integer >= 0."""
+    if not value.strip().isdigit():
+        raise argparse.ArgumentTypeError(f"invalid value {value!r}, expected an integer >= 0")
+    return int(value)
+
+def positive_float(value):
+    """argparse type for options that must be a number > 0."""
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is None or not number > 0:  # "not >" also rejects nan
+        raise argparse.ArgumentTypeError(f"invalid value {value!r}, expected a number > 0")
+    return number
+
+def parse_type_limits(value):
+    """Parses --per-type-limit values like "cisco_ios=8,alcatel_aos=4" into a dict."""
+    limits = {}
+    for item in value.split(","):
+        device_type, sep, limit = item.partition("=")
+        device_type, limit = device_type.strip(), limit.strip()
+        if not sep or not device_type or not limit.isdigit() or int(limit) < 1:
+            raise argparse.ArgumentTypeError(f"invalid limit {item!r}, expected device_type=N with N >= 1")
+        limits[device_type] = int(limit)
+    return limits
+
+class PlatformDispatcher:
+    """Submits backups to an executor with at most platform_limit() in flight per device type.
+
+    Devices over their type's limit wait here rather than in a worker thread, so
+    workers stay free for device types that still have slots.
+    """
+
+    def __init__(self, executor, backup):
+        self._executor = executor
+        self._backup = backup  # callable(device) -> bool
+        self._lock = threading.RLock()  # RLock: a done callback can run inline while submit() holds it
+        self._pending = defaultdict(deque)  # device_type -> devices waiting for a slot
+        self._in_flight = defaultdict(int)  # device_type -> backups submitted and not yet finished
+        self._outstanding = 0
+        self._all_done = threading.Event()
+        self._all_done.set()
+        self.submitted = 0
+
+    def submit(self, device):
+        """Queues a device for backup, starting it right away if its type has a free slot."""
+        with self._lock:
+            self.submitted += 1
+            self._outstanding += 1
+            self._all_done.clear()
+            if self._in_flight[device.device_type] < platform_limit(device.device_type):
+                self._in_flight[device.device_type] += 1
+                self._start(device)
+            else:
+                self._pending[device.device_type].append(device)
+
+    def wait(self):
+        """Blocks until every submitted device has been backed up (or has failed)."""
+        self._all_done.wait()
+
+    def _start(self, device):
+        future = self._executor.submit(self._backup, device)
+        future.add_done_callback(lambda f: self._done(device, f))
+
+    def _done(self, device, future):
+        exc = future.exception()
+        if exc is not None:
+            logging.error("Backup of %s raised: %s", device.name, exc)
+        elif not future.result():
+            logging.warning("Backup failed for %s.", device.name)
+        with self._lock:
+            pending = self._pending[device.device_type]
+            if pending:
+                self._start(pending.popleft())  # hand this type's slot to the next waiting device
+            else:
+                self._in_flight[device.device_type] -= 1
+            self._outstanding -= 1
+            if not self._outstanding:
+                self._all_done.set()
+
+@dataclass(frozen=True, slots=True)
+class Device:
+    """A network device entry from devices.yaml, validated once when the inventory is loaded.
+
+    Slots keep each record small and make attribute access cheaper than dict lookups.
+    """
+    name: str
+    host: str
+    username: str
+    password: str = field(repr=False)
+    device_type: str
+    # Any other keys from devices.yaml (e.g. per-device Netmiko timing overrides), or None if there are none
+    options: dict | None = field(default=None, hash=False)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a Device from one entry of the 'devices' list in devices.yaml.
+
+        Raises:
+            ValueError: If the entry isn't a mapping, is missing a required key, or a required value isn't a string.
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"Device entry must be a mapping, got {type(data).__name__}")
+        required = [f.name for f in fields(cls) if f.init and f.name != "options"]
+        missing = [key for key in required if key not in data]
+        if missing:
+            raise ValueError(f"Device {data.get('name', '<unnamed>')!r} is missing required key(s): {', '.join(missing)}")
+        # e.g. an unquoted "host: 10" or "password: 1234" is loaded as an int
+        not_str = [key for key in required if not isinstance(data[key], str)]
+        if not_str:
+            # Only the key names and types are reported, so a password value never ends up in the log
+            details = ", ".join(f"{key} ({type(data[key]).__name__})" for key in not_str)
+            raise ValueError(f"Device {data['name']!r} has non-string value(s) for: {details}; quote them in devices.yaml")
+        options = {key: value for key, value in data.items() if key not in required}
+        return cls(**{key: data[key] for key in required}, options=options or None)
+
+def _compose_node(yaml, loader, anchors):
+    """Builds the YAML node for the next value in the loader's event stream.
+
+    This is what yaml.compose() does internally, but node by node, so each device
+    entry can be handed out as soon as its events have been parsed. The yaml module
+    is passed in by iter_devices() so it's only imported once per parse.
+    """
+    if loader.check_event(yaml.AliasEvent):
+        event = loader.get_event()
+        if event.anchor not in anchors:
+            raise yaml.composer.ComposerError(None, None, "found undefined alias %r" % event.anchor, event.start_mark)
+        return anchors[event.anchor]
+
+    event = loader.get_event()
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+        if event.anchor is not None:
+            anchors[event.anchor] = node
+        return node
+
+    if isinstance(event, yaml.SequenceStartEvent):
+        node_class, end_event = yaml.SequenceNode, yaml.SequenceEndEvent
+    else:
+        node_class, end_event = yaml.MappingNode, yaml.MappingEndEvent
+    tag = event.tag
+    if tag is None or tag == "!":
+        tag = loader.resolve(node_class, None, event.implicit)
+    node = node_class(tag, [], event.start_mark, None, flow_style=event.flow_style)
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+    while not loader.check_event(end_event):
+        if node_class is yaml.SequenceNode:
+            node.value.append(_compose_node(yaml, loader, anchors))
+        else:
+            key = _compose_node(yaml, loader, anchors)
+            node.value.append((key, _compose_node(yaml, loader, anchors)))
+    node.end_mark = loader.get_event().end_mark
+    return node
+
+def iter_devices(devices_file="data/devices.yaml"):
+    """Yields device information from a YAML file one device at a time.
+
+    Devices are yielded as soon as they are parsed, so work on the first devices can
+    start before a large inventory has been read in full.
 
-def loadDevices(devices_file="data/devices.yaml"):
-    """Loads device information from a YAML file.
     Args:
         devices_file (str): Path to the YAML file containing device info.
+    Yields:
+        Device: One device entry from the top-level 'devices' list.
+    Raises:
+        OSError: If the file can't be opened.
+        yaml.YAMLError: If the file isn't valid YAML.
+        ValueError: If a device entry is missing required keys.
+    """
+    import yaml # type: ignore
+    try:
+        from yaml import CSafeLoader as SafeLoader # type: ignore # C (libyaml) parser, much faster
+    except ImportError:
+        from yaml import SafeLoader # type: ignore # pure-Python fallback
+
+    with open(devices_file, "rb") as f:
+        loader = SafeLoader(f)
+        try:
+            loader.get_event()  # StreamStartEvent
+            while not loader.check_event(yaml.StreamEndEvent):
+                loader.get_event()  # DocumentStartEvent
+                anchors = {}
+                if not loader.check_event(yaml.MappingStartEvent):
+                    _compose_node(yaml, loader, anchors)  # not a mapping, so there's no 'devices' key
+                else:
+                    loader.get_event()
+                    while not loader.check_event(yaml.MappingEndEvent):
+                        key = _compose_node(yaml, loader, anchors)
+                        if key.tag == "tag:yaml.org,2002:str" and key.value == "devices" and loader.check_event(yaml.SequenceStartEvent):
+                            loader.get_event()
+                            while not loader.check_event(yaml.SequenceEndEvent):
+                                yield Device.from_dict(loader.construct_document(_compose_node(yaml, loader, anchors)))
+                            loader.get_event()
+                        else:
+                            _compose_node(yaml, loader, anchors)  # other top-level keys are ignored
+                    loader.get_event()
+                loader.get_event()  # DocumentEndEvent
+        finally:
+            loader.dispose()
+
+# Netmiko timing settings: skip the conservative default sleeps and continue as soon as
+# the prompt is seen. Any of these can be overridden per device in devices.yaml for slow
+# platforms, e.g. "global_delay_factor: 2" or "auth_timeout: 30".
+NETMIKO_TIMING_DEFAULTS = {
+    'fast_cli': True,
+    'global_delay_factor': 0.1,
+    'conn_timeout': 10,
+    'banner_timeout': 5,
+    'auth_timeout': 10,
+}
+
+def build_netmiko_params(device):
+    """Builds the ConnectHandler arguments for a device from devices.yaml.
+
+    Netmiko's ConnectHandler expects specific parameters, and fields such as 'name'
+    are not valid Netmiko parameters, so only the known ones are copied.
+
+    Args:
+        device (Device): A device from devices.yaml.
     Returns:
-        list: A list of device dict, or None on error.
+        dict: Keyword arguments for netmiko.ConnectHandler (without session_log).
     """
+    netmiko_device_params = {
+        'host': device.host,
+        'username': device.username,
+        'password': device.password,
+        'device_type': device.device_type,
+    }
+    # You can add other Netmiko parameters here if needed, e.g.:
+    # 'port': 22, # Default SSH port, good to be explicit if not 22
+    # 'secret': options.get('secret'), # Use .get() to safely retrieve enable password if it might not exist
+
+    # Timing settings, with per-device overrides from devices.yaml
+    options = device.options or {}
+    for key, default in NETMIKO_TIMING_DEFAULTS.items():
+        netmiko_device_params[key] = options.get(key, default)
+    return netmiko_device_params
+
+# Buffer size for writing backup files (1 MiB)
+WRITE_BUFFER_SIZE = 1 << 20
 
+# zstd compression level for --compress; low levels are fast and config text still shrinks well
+ZSTD_LEVEL = 3
+
+# Command(s) captured into each backup file unless overridden with --command
+DEFAULT_COMMANDS = ("show running-config",)
+
+def link_unchanged_backup(backup_file, latest_file, digest):
+    """Symlinks backup_file to the device's previous backup if the content is unchanged.
+
+    Args:
+        backup_file (str): Path of the new backup file.
+        latest_file (str): Sidecar file recording the digest and file name of the device's last written backup.
+        digest (str): Digest of the new backup's (uncompressed) content.
+    Returns:
+        bool: True if backup_file was created as a link, False if it still needs to be written.
+    """
     try:
-        with open(devices_file, "r") as f:
-            devices_data = yaml.safe_load(f)    #use safe_load
-            # This line already correctly extracts from the 'devices' key
-            return devices_data.get("devices", [])  #handles if "devices" key doesn't exist
-    except FileNotFoundError:
-        logging.error(f"Error: {devices_file} not found.")
-        return None
-    except yaml.YAMLError as e:
-        logging.error(f"Error parsing YAML file: {e}")
-        return None
-    except Exception as e:
-        logging.error(f"An unexpected error occurred while loading devices: {e}")
-        return None
-
-def backup_config(device, backup_dir):
+        with open(latest_file, "r") as f:
+            prev_digest, prev_name = f.read().split(None, 1)
+    except (OSError, ValueError):
+        return False  # no previous backup recorded
+    prev_name = prev_name.strip()
+    # Only link to a backup with the same format (plain vs. --compress)
+    if prev_digest != digest or os.path.splitext(prev_name)[1] != os.path.splitext(backup_file)[1]:
+        return False
+    if not os.path.isfile(os.path.join(os.path.dirname(backup_file), prev_name)):
+        return False
+    try:
+        # Relative link, so the backup directory can be moved as a whole
+        os.symlink(prev_name, backup_file)
+    except OSError as e:
+        # e.g. symlinks not permitted (Windows without developer mode); fall back to a full copy
+        logging.debug("Could not link %s to %s: %s", backup_file, prev_name, e)
+        return False
+    return True
+
+def _tmp_path(path):
+    # Unique per process and thread, so devices sharing a name don't clobber each other's temp files
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def record_latest_backup(backup_file, latest_file, digest):
+    """Records backup_file as the device's latest written backup, for link_unchanged_backup()."""
+    tmp_file = _tmp_path(latest_file)
+    with open(tmp_file, "w") as f:
+        f.write(f"{digest} {os.path.basename(backup_file)}\n")
+    os.replace(tmp_file, latest_file)
+
+def backup_config(device, backup_dir, run_ts, commands=DEFAULT_COMMANDS, compress=False):
     """Backs up the configuration of a single network device using Netmiko.
 
+    All commands are run on the same SSH session. With more than one command,
+    each output is preceded by a banner line naming the command.
+
     Args:
-        device (dict): A dictionary containing device information (name, host, username, password, device_type).
+        device (Device): The device to back up.
         backup_dir (str): The directory to save the backup to.
+        run_ts (str): Timestamp of this backup run, used in the backup and session log file names.
+        commands (tuple): Show commands whose output is saved to the backup file.
+        compress (bool): Write the backup zstd-compressed, as a .config.zst file (needs zstandard).
     """
+    from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException, NetmikoBaseException # type: ignore # Added NetmikoBaseException
+
     session_log_path = None
     if ENABLE_SESSION_LOGGING:
-        # Create a specific directory for session logs if it doesn't exist
-        session_log_dir = "debug_logs/sessions"
-        os.makedirs(session_log_dir, exist_ok=True)
-        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        # The session log directory is created once in main()
+        session_log_dir = SESSION_LOG_DIR
         # Create a unique filename for the session log for this device
-        session_log_path = os.path.join(session_log_dir, f"{device['name']}-{timestamp}_session.log")
-        logging.debug(f"Session log for {device['name']} will be saved to {session_log_path}")
+        session_log_path = os.path.join(session_log_dir, f"{device.name}-{run_ts}_session.log")
+        logging.debug("Session log for %s will be saved to %s", device.name, session_log_path)
 
     # --- START OF CRUCIAL FIX & SESSION LOG INTEGRATION ---
-    # Netmiko's ConnectHandler expects specific parameters.
-    # We need to create a dictionary that only contains those parameters,
-    # as the 'name' key from devices.yaml is not a valid Netmiko parameter.
-    netmiko_device_params = {
-        'host': device['host'],
-        'username': device['username'],
-        'password': device['password'],
-        'device_type': device['device_type'],
-        # You can add other Netmiko parameters here if needed, e.g.:
-        # 'port': 22, # Default SSH port, good to be explicit if not 22
-        # 'secret': device.get('secret'), # Use .get() to safely retrieve enable password if it might not exist
-        # 'global_delay_factor': 2, # Can help with slow connections or large outputs
-        # 'timeout': 10, # Connection timeout in seconds
-    }
+    # Built here, once per backup, rather than precomputed when the inventory is loaded:
+    # each device is backed up once per run, so a stored copy would not save any work
+    # and would keep a second dict alive for every device in the inventory.
+    netmiko_device_params = build_netmiko_params(device)
 
     # Add the session_log parameter only if ENABLE_SESSION_LOGGING is True
     if session_log_path:
-        netmiko_device_params['session_log'] = session_log_path
+        netmiko_device_params = {**netmiko_device_params, 'session_log': session_log_path}
     # --- END OF CRUCIAL FIX & SESSION LOG INTEGRATION ---
 
+    backup_file = os.path.join(
+        backup_dir, f"{device.name}-{run_ts}.config"
+    )
+    if compress:
+        backup_file += ".zst"
+    latest_file = os.path.join(backup_dir, f"{device.name}.latest")
+
     try:
-        logging.info(f"Connecting to {device['name']} ({device['host']})")
-        # Now, Netmiko will receive only the parameters it expects
-        with netmiko.ConnectHandler(**netmiko_device_params) as net_connect:
-            net_connect.enable() # Attempt to enter enable mode
-            config = net_connect.send_command("show running-config")
-            timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-            backup_file = os.path.join(
-                backup_dir, f"{device['name']}-{timestamp}.config"
-            )
-            with open(backup_file, "w") as f:
-                f.write(config)
-            logging.info(f"Configuration backed up for {device['name']} to {backup_file}")
+        if compress:
+            import zstandard # type: ignore
+        digest = hashlib.blake2b()
+        # Each command's output is written to a temp file as soon as it arrives, then the file
+        # is moved into place: the backup appears atomically, outputs don't pile up in memory,
+        # and if backup_file already exists as a link it is replaced rather than written through.
+        # Binary mode with a large buffer skips the text layer's newline/codec pass and
+        # writes big configs in a few large syscalls.
+        tmp_file = _tmp_path(backup_file)
+        try:
+            with open(tmp_file, "wb", buffering=WRITE_BUFFER_SIZE) as raw, \
+                    (zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw) if compress else contextlib.nullcontext(raw)) as f:
+                logging.info("Connecting to %s (%s)", device.name, device.host)
+                # Now, Netmiko will receive only the parameters it expects.
+                # The dispatcher in main() caps sessions per device type; the pool keeps its idle ones within that cap.
+                net_connect = POOL.acquire(netmiko_device_params)
+                try:
+                    net_connect.enable() # Attempt to enter enable mode
+                    for command in commands:
+                        output = net_connect.send_command(command).encode("utf-8")
+                        if len(commands) > 1:
+                            chunks = (f"!{'=' * 20} {command} {'=' * 20}\n".encode("utf-8"), output, b"\n\n")
+                        else:
+                            chunks = (output,)
+                        for chunk in chunks:
+                            digest.update(chunk)
+                            f.write(chunk)
+                finally:
+                    POOL.release(net_connect)
+            digest = digest.hexdigest()
+
+            # Most configs don't change between runs; link to the previous backup instead of keeping a copy
+            if link_unchanged_backup(backup_file, latest_file, digest):
+                os.remove(tmp_file)
+                logging.info("Configuration unchanged for %s, linked %s to the previous backup", device.name, backup_file)
+                return True
+            os.replace(tmp_file, backup_file)
+        except Exception:
+            # Don't leave a partial backup behind
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+        record_latest_backup(backup_file, latest_file, digest)
+        logging.info("Configuration backed up for %s to %s", device.name, backup_file)
         return True # Indicate success
     except NetmikoTimeoutException:
-        logging.error(f"Timeout connecting to {device['name']} ({device['host']}). Possible issues: device off, network path blocked by firewall, incorrect IP, or high latency.")
+        logging.error("Timeout connecting to %s (%s). Possible issues: device off, network path blocked by firewall, incorrect IP, or high latency.", device.name, device.host)
         if session_log_path:
-            logging.debug(f"Review session log at {session_log_path} for more details (it may be empty if connection failed early).")
+            logging.debug("Review session log at %s for more details (it may be empty if connection failed early).", session_log_path)
         return False
     except NetmikoAuthenticationException:
-        logging.error(f"Authentication failed for {device['name']} ({device['host']}). Check username, password, or enable password in devices.yaml. Device is reachable.")
+        logging.error("Authentication failed for %s (%s). Check username, password, or enable password in devices.yaml. Device is reachable.", device.name, device.host)
         if session_log_path:
-            logging.debug(f"Review session log at {session_log_path} for authentication handshake details.")
+            logging.debug("Review session log at %s for authentication handshake details.", session_log_path)
         return False
     except NetmikoBaseException as e: # Catches other Netmiko-specific errors (e.g., SSH, Read, EOF)
-        logging.error(f"Netmiko specific error with {device['name']} ({device['host']}): {e}. This indicates a problem during the SSH/Telnet session setup or command execution.")
+        logging.error("Netmiko specific error with %s (%s): %s. This indicates a problem during the SSH/Telnet session setup or command execution.", device.name, device.host, e)
         if session_log_path:
-            logging.debug(f"Review session log at {session_log_path} for Netmiko's interaction with the device.")
+            logging.debug("Review session log at %s for Netmiko's interaction with the device.", session_log_path)
         return False
     except Exception as e: # Catches any other unexpected Python errors
-        logging.error(f"An unexpected Python error occurred while backing up {device['name']} ({device['host']}): {e}. This might be a bug in the script itself.")
+        logging.error("An unexpected Python error occurred while backing up %s (%s): %s. This might be a bug in the script itself.", device.name, device.host, e)
         if session_log_path:
-            logging.debug(f"Review session log at {session_log_path} as well for clues.")
+            logging.debug("Review session log at %s as well for clues.", session_log_path)
         return False
 
 
@@ -138,7 +582,52 @@ def main():
         default="backups",
         help="Path to the backup directory"
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=positive_int,
+        default=32,
+        help="Number of devices to back up in parallel (default: 32); "
+             "the per-device-type limit (--per-type-limit) applies on top of this"
+    )
+    parser.add_argument(
+        "-c",
+        "--command",
+        action="append",
+        dest="commands",
+        help="Command to capture in the backup; repeat to run several on one session (default: show running-config)"
+    )
+    parser.add_argument(
+        "-z",
+        "--compress",
+        action="store_true",
+        help="Compress backup files with zstd (.config.zst); requires the zstandard package"
+    )
+    parser.add_argument(
+        "--per-type-limit",
+        type=parse_type_limits,
+        default={},
+        help="Max concurrent sessions per device_type, e.g. cisco_ios=8,alcatel_aos=4 "
+             "(other types: MAX_PER_PLATFORM environment variable, default 4)"
+    )
+    parser.add_argument(
+        "--max-idle",
+        type=non_negative_int,
+        default=0,
+        help="Number of idle SSH connections kept open for reuse (default: 0, disconnect after each backup)"
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=positive_float,
+        default=300,
+        help="Seconds an unused SSH connection is kept open for reuse (default: 300)"
+    )
     args = parser.parse_args()
+    global DEFAULT_PLATFORM_LIMIT
+    try:
+        DEFAULT_PLATFORM_LIMIT = positive_int(os.getenv("MAX_PER_PLATFORM", str(DEFAULT_PLATFORM_LIMIT)))
+    except argparse.ArgumentTypeError as e:
+        parser.error(f"MAX_PER_PLATFORM environment variable: {e}")
 
     # Configure logging
     log_level = logging.DEBUG if args.verbose else logging.INFO
@@ -149,24 +638,66 @@ def main():
             logging.StreamHandler(sys.stdout),  # Output to console
         ],
     )
+    # netmiko is imported lazily (see the top of the file); make sure it's there before starting
+    if importlib.util.find_spec("netmiko") is None:
+        logging.error("The netmiko package is required (pip install netmiko). Exiting.")
+        sys.exit(1)
+    if args.compress:
+        if importlib.util.find_spec("zstandard") is None:
+            logging.error("--compress requires the zstandard package (pip install zstandard). Exiting.")
+            sys.exit(1)
     devices_file = args.devices
+    POOL.idle_timeout = args.idle_timeout
+    POOL.max_idle = args.max_idle
+    PLATFORM_LIMITS.update(args.per_type_limit)
     backup_dir = args.backup_dir
 
     # Create necessary directories
     os.makedirs(backup_dir, exist_ok=True)
     # This check now works because ENABLE_SESSION_LOGGING is defined globally at the top
     if ENABLE_SESSION_LOGGING:
-        os.makedirs("debug_logs/sessions", exist_ok=True)
+        os.makedirs(SESSION_LOG_DIR, exist_ok=True)
 
-    devices = loadDevices(devices_file)
-    if devices is None:
+    import yaml # type: ignore # for yaml.YAMLError below
+
+    # One timestamp for the whole run, so a device's backup and session log names match
+    run_ts = time.strftime("%Y%m%d-%H%M%S")
+    commands = tuple(args.commands) if args.commands else DEFAULT_COMMANDS
+
+    # Backups are I/O bound (SSH handshake + waiting on the device), so threads
+    # let the per-device waits overlap instead of adding up. Devices are submitted
+    # as they are read from the YAML file, so backups start before parsing finishes.
+    load_failed = False
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            dispatcher = PlatformDispatcher(
+                executor, lambda device: backup_config(device, backup_dir, run_ts, commands, args.compress)
+            )
+            try:
+                for device in iter_devices(devices_file):
+                    dispatcher.submit(device)
+            except FileNotFoundError:
+                logging.error("Error: %s not found.", devices_file)
+                load_failed = True
+            except yaml.YAMLError as e:
+                logging.error("Error parsing YAML file: %s", e)
+                load_failed = True
+            except ValueError as e:
+                logging.error("Invalid device entry: %s", e)
+                load_failed = True
+            except Exception as e:
+                logging.error("An unexpected error occurred while loading devices: %s", e)
+                load_failed = True
+
+            if not dispatcher.submitted and not load_failed:
+                logging.warning("No devices found in the YAML file.")
+            # Any devices read before a loading error are still backed up
+            dispatcher.wait()
+    finally:
+        POOL.close_all()
+    if load_failed:
         logging.error("Failed to load devices. Exiting.")
         sys.exit(1)
-
-    for device in devices:
-        backup_successful = backup_config(device, backup_dir)
-        if not backup_successful:
-            logging.warning(f"Backup failed for {device['name']}. Continuing with next device...")
     logging.info("Backup process completed.")
 
 
@@ -1,39 +1,137 @@
 
 
 
-from cmath import e
-import subprocess
+import asyncio
+import contextlib
 import argparse
 import logging
+import os
 import sys
 import yaml  # Import the PyYAML library
+try:
+    from yaml import CSafeLoader as SafeLoader # type: ignore # C (libyaml) parser, much faster
+except ImportError:
+    from yaml import SafeLoader # type: ignore # pure-Python fallback
+try:
+    # Optional: icmplib sends echo requests from this process instead of spawning /bin/ping per host
+    from icmplib import async_ping # type: ignore
+    from icmplib.exceptions import NameLookupError, SocketPermissionError # type: ignore
+except ImportError:
+    async_ping = None
 
-def ping_host(host):
+# Upper bound on pings in flight at once, so large inventories don't exhaust file descriptors
+MAX_CONCURRENT_PINGS = 256
+
+async def ping_host(host, semaphore=None):
     """
     Pings a single host.
 
     Args:
         host (str): The hostname or IP address to ping.
+        semaphore (asyncio.Semaphore): Optional limit on concurrent pings.
+
+    Returns:
+        bool: True if the host is reachable, False otherwise.
+    """
+    try:
+        async with semaphore or contextlib.nullcontext():
+            # Run ping as a child process; the event loop waits on many of these at once
+            proc = await asyncio.create_subprocess_exec(
+                "ping", "-c", "1", host,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            returncode = await proc.wait()
+        if returncode == 0:
+            logging.info("Successfully pinged %s", host)
+            return True
+        logging.warning("Failed to ping %s", host)
+        return False
+    except Exception as e:
+        logging.error("An error occurred while pinging %s: %s", host, e)
+        return False
+
+async def ping_host_icmp(host, semaphore, privileged):
+    """
+    Pings a single host over an ICMP socket using icmplib.
+
+    Args:
+        host (str): The hostname or IP address to ping.
+        semaphore (asyncio.Semaphore): Limit on concurrent pings.
+        privileged (bool): Use raw sockets (root) instead of unprivileged datagram sockets.
 
     Returns:
         bool: True if the host is reachable, False otherwise.
+
+    Raises:
+        SocketPermissionError: If this process isn't allowed to open ICMP sockets.
     """
     try:
-        # Use subprocess.run for better control and error handling
-        result = subprocess.run(
-            ["ping", "-c", "1", host],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=True,
-        )
-        logging.info(f"Successfully pinged {host}")
-        return True
-    except subprocess.CalledProcessError:
-        logging.warning(f"Failed to ping {host}")
+        async with semaphore:
+            result = await async_ping(host, count=1, interval=0, privileged=privileged)
+    except SocketPermissionError:
+        raise
+    except NameLookupError:
+        logging.warning("Failed to ping %s: name could not be resolved", host)
         return False
     except Exception as e:
-        logging.error(f"An error occurred while pinging {host}: {e}")
+        logging.error("An error occurred while pinging %s: %s", host, e)
         return False
+    if result.is_alive:
+        logging.info("Successfully pinged %s", host)
+    else:
+        logging.warning("Failed to ping %s", host)
+    return result.is_alive
+
+async def ping_hosts_icmp(hosts):
+    """
+    Pings all hosts concurrently over ICMP sockets using icmplib.
+
+    Args:
+        hosts (list): Hostnames or IP addresses to ping.
+
+    Returns:
+        list: One bool per host, in the same order as hosts.
+
+    Raises:
+        SocketPermissionError: If this process isn't allowed to open ICMP sockets.
+    """
+    # Raw sockets need root; otherwise use unprivileged datagram ICMP sockets
+    # (allowed by the kernel's net.ipv4.ping_group_range setting).
+    privileged = hasattr(os, "geteuid") and os.geteuid() == 0
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PINGS)
+    results = await asyncio.gather(
+        *(ping_host_icmp(host, semaphore, privileged) for host in hosts),
+        return_exceptions=True,
+    )
+    # Socket permissions apply to the whole process, so one denial means none of the pings ran.
+    # Every other error is already handled per host in ping_host_icmp().
+    for result in results:
+        if isinstance(result, SocketPermissionError):
+            raise result
+    return results
+
+async def ping_hosts(hosts):
+    """
+    Pings all hosts concurrently.
+
+    Uses icmplib when it is installed and ICMP sockets are permitted, and
+    falls back to running the system ping command otherwise.
+
+    Args:
+        hosts (list): Hostnames or IP addresses to ping.
+
+    Returns:
+        list: One bool per host, in the same order as hosts.
+    """
+    if async_ping is not None:
+        try:
+            return await ping_hosts_icmp(hosts)
+        except SocketPermissionError as e:
+            logging.debug("ICMP sockets not permitted (%s), falling back to the ping command", e)
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PINGS)
+    return await asyncio.gather(*(ping_host(host, semaphore) for host in hosts))
 
 def main():
     """
@@ -68,27 +166,38 @@ def main():
 
     try:
         with open(args.file, "r") as f:
-            devices_data = yaml.safe_load(f)  # Use yaml.safe_load()
+            devices_data = yaml.load(f, Loader=SafeLoader)  # Safe loader, libyaml-backed when available
             devices = devices_data.get("devices", [])  # Get the list of devices
             if not devices:
                 logging.warning("No devices found in the YAML file.")
                 sys.exit(0)
     except FileNotFoundError:
-        logging.error(f"File not found: {args.file}")
+        logging.error("File not found: %s", args.file)
         sys.exit(1)
     except yaml.YAMLError as e:
-        logging.error(f"Error parsing YAML file: {e}")
+        logging.error("Error parsing YAML file: %s", e)
         sys.exit(1)
     except Exception as e:
-        logging.error(f"An unexpected error occurred: {e}")
+        logging.error("An unexpected error occurred: %s", e)
         sys.exit(1)
 
+    hosts = []
     for device in devices:
         if "host" in device:  # Check if 'host' key exists
-            host = device["host"]
-            ping_host(host)
+            hosts.append(device["host"])
         else:
-            logging.warning(f"Device missing 'host' key: {device}")
+            logging.warning("Device missing 'host' key: %s", device)
+
+    # Optional: uvloop's libuv-based event loop schedules tasks and subprocesses faster
+    try:
+        import uvloop # type: ignore
+    except ImportError:
+        uvloop = None
+    if uvloop is not None and hasattr(asyncio, "Runner"):  # asyncio.Runner is Python 3.11+
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            runner.run(ping_hosts(hosts))
+    else:
+        asyncio.run(ping_hosts(hosts))
 
 if __name__ == "__main__":
     main()